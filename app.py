@@ -1,14 +1,26 @@
 import os
+import re
 import json
 import time
-from typing import Dict, Any, List
-from flask import Flask, jsonify, request
-from flask_cors import CORS
-from web3 import Web3
+import hashlib
+import asyncio
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple
+import msgspec
+import numpy as np
+import orjson
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
+from eth_abi import decode as abi_decode, encode as abi_encode
+from eth_utils import function_signature_to_4byte_selector
+from quart import Quart, Response, request
+from quart_cors import route_cors
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+from web3 import AsyncWeb3, Web3
 from eth_account import Account
 
 # ⭐ ADDED: performance endpoint import
-from performance_analysis import compute_performance_for_panel
+from performance_analysis import EventRecord, compute_performance_for_panel, unix_to_iso_array, warm_up
 
 # -------------------------------------------------------------------
 # Configuration (from environment variables)
@@ -19,6 +31,23 @@ ABI_PATH = os.getenv("ABI_PATH", "contract_abi.json")
 PANELS_DIR = os.getenv("PANELS_DIR", "panels")
 CHAIN_ID = int(os.getenv("CHAIN_ID", "11155111")) # Sepolia default
 
+# Canonical Multicall3 deployment (same address on Sepolia and mainnet)
+MULTICALL3_ADDRESS = os.getenv("MULTICALL3_ADDRESS", "0xcA11bde05977b3631167028862bE2a173976CA11")
+MULTICALL_BATCH_SIZE = int(os.getenv("MULTICALL_BATCH_SIZE", "500"))  # getEventAt calls per eth_call
+
+# Optional Redis cache for decoded chain events (disabled when REDIS_URL is unset)
+REDIS_URL = os.getenv("REDIS_URL")                # e.g. redis://localhost:6379/0
+EVENTS_CACHE_TTL = int(os.getenv("EVENTS_CACHE_TTL", "60"))  # seconds
+REDIS_TIMEOUT = float(os.getenv("REDIS_TIMEOUT", "0.2"))      # connect/read timeout, then fall back to the node
+
+# HTTP caching: block_number is re-read at most every BLOCK_NUMBER_TTL seconds
+BLOCK_NUMBER_TTL = float(os.getenv("BLOCK_NUMBER_TTL", "1"))
+CACHE_MAX_AGE = int(os.getenv("CACHE_MAX_AGE", "15"))  # Cache-Control max-age for /api responses
+
+# RPC connection pool (shared keep-alive sockets to the Infura endpoint)
+RPC_TIMEOUT = float(os.getenv("RPC_TIMEOUT", "10"))            # seconds per JSON-RPC request
+RPC_MAX_CONNECTIONS = int(os.getenv("RPC_MAX_CONNECTIONS", "100"))
+
 PRIVATE_KEY = os.getenv("PRIVATE_KEY")            # Only needed if you sign TXs
 ORACLE_ADDRESS = os.getenv("ORACLE_ADDRESS")
 ADMIN_ADDRESS = os.getenv("ADMIN_ADDRESS")
@@ -33,44 +62,155 @@ CONTRACT_ADDRESS = Web3.to_checksum_address(CONTRACT_ADDRESS_ENV)
 # -------------------------------------------------------------------
 # Web3 setup
 # -------------------------------------------------------------------
-w3 = Web3(Web3.HTTPProvider(INFURA_URL))
-if not w3.is_connected():
-    raise RuntimeError("Web3 not connected to RPC")
+provider = AsyncWeb3.AsyncHTTPProvider(INFURA_URL, request_kwargs={"timeout": ClientTimeout(total=RPC_TIMEOUT)})
+w3 = AsyncWeb3(provider)
+
+# Created on the serving event loop, see setup_rpc_session()
+rpc_session: Optional[ClientSession] = None
 
 with open(ABI_PATH, "r", encoding="utf-8") as f:
     CONTRACT_ABI = json.load(f)
 
 contract = w3.eth.contract(address=CONTRACT_ADDRESS, abi=CONTRACT_ABI)
 
+# Only aggregate3 is needed from Multicall3
+MULTICALL3_ABI = [{
+    "inputs": [{
+        "components": [
+            {"internalType": "address", "name": "target", "type": "address"},
+            {"internalType": "bool", "name": "allowFailure", "type": "bool"},
+            {"internalType": "bytes", "name": "callData", "type": "bytes"}
+        ],
+        "internalType": "struct Multicall3.Call3[]",
+        "name": "calls",
+        "type": "tuple[]"
+    }],
+    "name": "aggregate3",
+    "outputs": [{
+        "components": [
+            {"internalType": "bool", "name": "success", "type": "bool"},
+            {"internalType": "bytes", "name": "returnData", "type": "bytes"}
+        ],
+        "internalType": "struct Multicall3.Result[]",
+        "name": "returnData",
+        "type": "tuple[]"
+    }],
+    "stateMutability": "payable",
+    "type": "function"
+}]
+
+multicall = w3.eth.contract(address=Web3.to_checksum_address(MULTICALL3_ADDRESS), abi=MULTICALL3_ABI)
+
+# Contract functions and selectors used on every request, resolved once at import
+GET_EVENT_COUNT_FN = contract.get_function_by_name("getEventCount")
+AGGREGATE3_FN = multicall.get_function_by_name("aggregate3")
+GET_EVENT_AT_ABI = contract.get_function_by_name("getEventAt").abi
+
+# The calldata template assumes (panel_id, index) inputs: see _get_event_at_template()
+GET_EVENT_AT_INPUTS = ("string", "uint256")
+if tuple(i["type"] for i in GET_EVENT_AT_ABI["inputs"]) != GET_EVENT_AT_INPUTS:
+    raise RuntimeError("getEventAt inputs in ABI do not match GET_EVENT_AT_INPUTS")
+GET_EVENT_AT_SELECTOR = function_signature_to_4byte_selector(
+    f"{GET_EVENT_AT_ABI['name']}({','.join(GET_EVENT_AT_INPUTS)})"
+)
+
+# Every getEventAt result has the same shape: (ok, color, status, prediction, reason, timestamp)
+EVENT_SCHEMA = ("bool", "string", "string", "int256", "string", "uint256")
+if tuple(o["type"] for o in GET_EVENT_AT_ABI["outputs"]) != EVENT_SCHEMA:
+    raise RuntimeError("getEventAt outputs in ABI do not match EVENT_SCHEMA")
+
+# -------------------------------------------------------------------
+# Redis setup (optional)
+# -------------------------------------------------------------------
+# Bump when the cached payload layout (EventRecord fields/encoding) changes
+EVENTS_CACHE_VERSION = 1
+redis_client = (
+    aioredis.from_url(REDIS_URL, socket_connect_timeout=REDIS_TIMEOUT, socket_timeout=REDIS_TIMEOUT)
+    if REDIS_URL else None
+)
+# Typed decoder for cached payloads: validates and rebuilds EventRecord structs in C
+_EVENTS_DECODER = msgspec.json.Decoder(List[EventRecord])
+
 # Account object (optional)
 if PRIVATE_KEY:
     account = Account.from_key(PRIVATE_KEY)
     print(f"Oracle account loaded: {account.address}")
 
 # -------------------------------------------------------------------
-# Flask app with CORS
+# Quart (ASGI) app with CORS
 # -------------------------------------------------------------------
-app = Flask(__name__)
+app = Quart(__name__)
 
-# Allow your deployed frontend domains
-CORS(app, resources={
-    r"/api/*": {
-        "origins": [
-            "https://www.blockchain-powered-dpp-af.com"
+# Allow your deployed frontend domains (applied to the /api/* routes)
+ALLOWED_ORIGINS = [
+    "https://www.blockchain-powered-dpp-af.com"
+]
 
-        ]
-    }
-})
+@app.before_serving
+async def setup_rpc_session():
+    global rpc_session
+    # web3's default session closes the connection after every request;
+    # cache a pooled keep-alive session for the provider instead.
+    rpc_session = ClientSession(
+        raise_for_status=True,
+        connector=TCPConnector(limit=RPC_MAX_CONNECTIONS, enable_cleanup_closed=True),
+    )
+    await provider.cache_async_session(rpc_session)
+    if not await w3.is_connected():
+        raise RuntimeError("Web3 not connected to RPC")
+
+@app.before_serving
+async def warm_up_scoring():
+    # JIT compilation would otherwise block this worker's event loop on the first /api/performance
+    warm_up()
+
+@app.after_serving
+async def close_rpc_session():
+    if rpc_session is not None:
+        await rpc_session.close()
 
 # -------------------------------------------------------------------
 # Helpers
 # -------------------------------------------------------------------
-def load_panel_json(panel_id: str) -> Dict[str, Any]:
+# Panel ids map to file names, so only allow a safe character set (no path traversal)
+_PANEL_ID_RE = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+# Parsed panel files keyed by panel_id: (st_mtime_ns, dpp)
+_PANEL_CACHE: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+
+def load_panel_json(panel_id: str) -> Tuple[Dict[str, Any], int]:
     path = os.path.join(PANELS_DIR, f"{panel_id}.json")
-    if not os.path.exists(path):
-        raise FileNotFoundError(f"Panel JSON not found: {path}")
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    # Raises FileNotFoundError for unknown panels
+    mtime_ns = os.stat(path).st_mtime_ns
+    cached = _PANEL_CACHE.get(panel_id)
+    if cached is None or cached[0] != mtime_ns:
+        with open(path, "rb") as f:
+            cached = (mtime_ns, orjson.loads(f.read()))
+        _PANEL_CACHE[panel_id] = cached
+    # The cached dict stays read-only: copy only the containers that
+    # merge_events_into_dpp and the routes write to
+    dpp = dict(cached[1])
+    if isinstance(dpp.get("digital_twin_status"), dict):
+        dpp["digital_twin_status"] = dict(dpp["digital_twin_status"])
+    for key in ("fault_log_operation", "_warnings"):
+        if isinstance(dpp.get(key), list):
+            dpp[key] = list(dpp[key])
+    return dpp, mtime_ns
+
+def json_response(payload: Any, status: int = 200) -> Response:
+    # orjson serializes straight to bytes (and handles NumPy values natively)
+    return Response(orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY), status=status, mimetype="application/json")
+
+def make_etag(*parts: Any) -> str:
+    return hashlib.sha1(":".join(str(p) for p in parts).encode()).hexdigest()
+
+def not_modified(etag: str) -> bool:
+    return etag in request.if_none_match
+
+def cacheable(response: Response, etag: str) -> Response:
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = f"public, max-age={CACHE_MAX_AGE}"
+    return response
 
 def filter_by_access(dpp: Dict[str, Any], access: str) -> Dict[str, Any]:
     access = access.lower()
@@ -99,78 +239,145 @@ def filter_by_access(dpp: Dict[str, Any], access: str) -> Dict[str, Any]:
 
     return filtered
 
-def fetch_events_for_panel(panel_id: str) -> List[Dict[str, Any]]:
-    count = contract.functions.getEventCount(panel_id).call()
+# (monotonic time of the read, block number)
+_LATEST_BLOCK: Tuple[float, int] = (float("-inf"), 0)
+
+async def get_latest_block() -> int:
+    global _LATEST_BLOCK
+    now = time.monotonic()
+    if now - _LATEST_BLOCK[0] >= BLOCK_NUMBER_TTL:
+        _LATEST_BLOCK = (now, await w3.eth.block_number)
+    return _LATEST_BLOCK[1]
+
+async def fetch_events_for_panel(panel_id: str, block: int) -> List[EventRecord]:
+    # Events are immutable once mined, so (panel, block) fully identifies the history
+    key = f"events:v{EVENTS_CACHE_VERSION}:{panel_id}:{block}"
+    if redis_client is not None:
+        try:
+            cached = await redis_client.get(key)
+        except RedisError:
+            cached = None  # cache outage: fall back to the node
+        if cached is not None:
+            try:
+                return _EVENTS_DECODER.decode(cached)
+            except msgspec.DecodeError:
+                pass  # stale or corrupt payload: treat as a miss and overwrite it below
+
+    events = await read_events_from_chain(panel_id, block)
+
+    if redis_client is not None:
+        try:
+            await redis_client.setex(key, EVENTS_CACHE_TTL, msgspec.json.encode(events))
+        except RedisError:
+            pass
+    return events
+
+@lru_cache(maxsize=1024)
+def _get_event_at_template(panel_id: str) -> Tuple[bytes, bytes]:
+    # getEventAt(string,uint256) calldata is selector | string offset | index | string tail,
+    # so only bytes 36..68 depend on the index.
+    calldata = GET_EVENT_AT_SELECTOR + abi_encode(GET_EVENT_AT_INPUTS, [panel_id, 0])
+    return calldata[:36], calldata[68:]
+
+def encode_get_event_at(panel_id: str, idx: int) -> bytes:
+    head, tail = _get_event_at_template(panel_id)
+    return head + idx.to_bytes(32, "big") + tail
+
+async def read_events_from_chain(panel_id: str, block: int) -> List[EventRecord]:
+    # Pin every read to one block so the count and the events stay consistent
+    count = await GET_EVENT_COUNT_FN(panel_id).call(block_identifier=block)
     events = []
-    for idx in range(count):
-        ok, color, status, prediction, reason, timestamp = contract.functions.getEventAt(panel_id, idx).call()
-        events.append({
-            "timestamp": int(timestamp),
-            "color": color,
-            "status": status,
-            "prediction": int(prediction),
-            "reason": reason,
-            "ok": bool(ok)
-        })
+    # One eth_call per batch of getEventAt calls instead of one per event
+    for start in range(0, count, MULTICALL_BATCH_SIZE):
+        calls = [
+            (CONTRACT_ADDRESS, False, encode_get_event_at(panel_id, idx))
+            for idx in range(start, min(start + MULTICALL_BATCH_SIZE, count))
+        ]
+        results = await AGGREGATE3_FN(calls).call(block_identifier=block)
+        # eth_abi already yields bool/str/int, so records are built without re-casting
+        events.extend(EventRecord(*abi_decode(EVENT_SCHEMA, return_data)) for _success, return_data in results)
     return events
 
-def merge_events_into_dpp(dpp: Dict[str, Any], events: List[Dict[str, Any]]) -> Dict[str, Any]:
+def merge_events_into_dpp(dpp: Dict[str, Any], events: List[EventRecord]) -> Dict[str, Any]:
     dpp.setdefault("fault_log_installation", [])
     dpp.setdefault("fault_log_operation", [])
     if "digital_twin_status" in dpp and events:
         latest = events[-1]
-        dpp["digital_twin_status"]["current_visual_status"] = latest["status"]
-        dpp["digital_twin_status"]["last_color_change"] = latest["color"]
-    for evt in events:
-        entry = {
-            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(evt["timestamp"])),
-            "color": evt["color"],
-            "status": evt["status"],
-            "prediction": evt["prediction"],
-            "reason": evt["reason"]
+        dpp["digital_twin_status"]["current_visual_status"] = latest.status
+        dpp["digital_twin_status"]["last_color_change"] = latest.color
+    # Only faults, warnings and system errors are logged; build entries for those alone
+    logged = [e for e in events if e.prediction in (1, 2, -1)]
+    iso = unix_to_iso_array(np.array([e.timestamp for e in logged], dtype=np.int64))
+    dpp["fault_log_operation"].extend([
+        {
+            "timestamp": timestamp,
+            "color": e.color,
+            "status": e.status,
+            "prediction": e.prediction,
+            "reason": e.reason
         }
-        if evt["prediction"] in (1, 2, -1):
-            dpp["fault_log_operation"].append(entry)
+        for e, timestamp in zip(logged, iso)
+    ])
     return dpp
 
 # -------------------------------------------------------------------
 # Routes
 # -------------------------------------------------------------------
 @app.get("/api/dpp/<panel_id>")
-def get_dpp(panel_id: str):
+@route_cors(allow_origin=ALLOWED_ORIGINS)
+async def get_dpp(panel_id: str):
     access = request.args.get("access", "public").lower()
+    if not _PANEL_ID_RE.fullmatch(panel_id):
+        return json_response({"error": "Invalid panel_id"}, 400)
     try:
-        dpp = load_panel_json(panel_id)
+        # Disk read runs in a worker thread so it does not block the event loop
+        dpp, mtime_ns = await asyncio.to_thread(load_panel_json, panel_id)
     except FileNotFoundError:
-        return jsonify({"error": "Panel JSON not found"}), 404
+        return json_response({"error": "Panel JSON not found"}, 404)
+    etag = None
     try:
-        events = fetch_events_for_panel(panel_id)
+        block = await get_latest_block()
+        # Nothing changes until a new block or a panel file edit
+        block_etag = make_etag("dpp", panel_id, access, block, mtime_ns)
+        if not_modified(block_etag):
+            return cacheable(Response(status=304), block_etag)
+        events = await fetch_events_for_panel(panel_id, block)
         dpp = merge_events_into_dpp(dpp, events)
+        etag = block_etag
     except Exception as e:
         dpp.setdefault("_warnings", []).append(f"Blockchain events not merged: {str(e)}")
     filtered = filter_by_access(dpp, access)
-    return jsonify({"panel_id": panel_id, "access": access, "data": filtered})
+    response = json_response({"panel_id": panel_id, "access": access, "data": filtered})
+    return cacheable(response, etag) if etag else response
 
 
 # ⭐⭐⭐ ADDED: PERFORMANCE ANALYSIS ENDPOINT ⭐⭐⭐
 @app.get("/api/performance/<panel_id>")
-def get_performance(panel_id: str):
+@route_cors(allow_origin=ALLOWED_ORIGINS)
+async def get_performance(panel_id: str):
     """
     Returns SSI, TBI, Performance Score + system errors for this panel.
     """
+    if not _PANEL_ID_RE.fullmatch(panel_id):
+        return json_response({"error": "Invalid panel_id"}, 400)
+
     # Load panel JSON
     try:
-        dpp = load_panel_json(panel_id)
+        dpp, mtime_ns = await asyncio.to_thread(load_panel_json, panel_id)
     except FileNotFoundError:
-        return jsonify({"error": "Panel JSON not found"}), 404
+        return json_response({"error": "Panel JSON not found"}, 404)
 
     # Fetch blockchain events
     try:
-        events = fetch_events_for_panel(panel_id)
+        block = await get_latest_block()
+        etag = make_etag("performance", panel_id, block, mtime_ns)
+        if not_modified(etag):
+            return cacheable(Response(status=304), etag)
+        events = await fetch_events_for_panel(panel_id, block)
     except Exception as e:
         installation = dpp.get("installation_metadata", {})
         # Return minimal response but DO NOT crash backend
-        return jsonify({
+        return json_response({
             "panel_id": panel_id,
             "data": {
                 "panel_metadata": {
@@ -186,20 +393,26 @@ def get_performance(panel_id: str):
                 "system_events": [],
                 "_warnings": [f"Performance not computed: {str(e)}"],
             },
-        }), 200
+        }, 200)
 
     perf = compute_performance_for_panel(dpp, events)
-    return jsonify({"panel_id": panel_id, "data": perf})
+    return cacheable(json_response({"panel_id": panel_id, "data": perf}), etag)
 
 
 # -------------------------------------------------------------------
 # Health check (optional, useful for Render)
 # -------------------------------------------------------------------
 @app.get("/health")
-def health():
+async def health():
     return {"status": "ok"}, 200
 
 
 if __name__ == "__main__":
+    # Local development only. Production runs gunicorn with uvicorn workers
+    # (see Procfile): handlers are I/O-bound, so each worker process overlaps
+    # many in-flight RPCs on its event loop and WEB_CONCURRENCY sets the
+    # number of processes.
+    import uvicorn
+
     port = int(os.getenv("PORT", "8000"))
-    app.run(host="0.0.0.0", port=port)
+    uvicorn.run(app, host="0.0.0.0", port=port)
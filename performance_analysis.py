@@ -1,9 +1,26 @@
 import math
-import time
-from typing import Any, Dict, List
+from typing import Any, Dict, List, NamedTuple, Tuple
+
+import msgspec
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional: run the same kernels as plain Python
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda fn: fn
 
 SECONDS_IN_HOUR = 3600
 WINDOW_HOURS = 24.0
+WINDOW_SECONDS = int(WINDOW_HOURS * SECONDS_IN_HOUR)
+
+# Integer kind codes used by the scoring kernel
+KIND_STRUCTURAL = 0
+KIND_THERMAL = 1
+KIND_OTHER = 2
+KIND_SYSTEM = 3
 
 # Normalization constants (can be tuned later)
 STRUCT_FAULTS_MAX_PER_DAY = 5.0
@@ -11,84 +28,158 @@ THERMAL_EVENTS_MAX_PER_DAY = 5.0
 NOISE_EVENTS_MAX_PER_DAY = 10.0  # reserved for future use
 
 
-def _unix_to_iso(ts: int) -> str:
+def unix_to_iso_array(ts: np.ndarray) -> List[str]:
     """
-    Convert a UNIX timestamp (seconds) to ISO 8601 string in UTC.
+    Convert an array of UNIX timestamps (seconds) to ISO 8601 strings in UTC,
+    formatted in one vectorized step.
     """
-    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(ts))
+    iso = np.datetime_as_string(ts.astype("datetime64[s]"), unit="s")
+    return np.char.add(iso, "Z").tolist()
 
 
-def _classify_event(evt: Dict[str, Any]) -> Dict[str, str]:
+def _contains_any(values: np.ndarray, keywords: Tuple[str, ...]) -> np.ndarray:
     """
-    Classify an event into:
-      - domain: 'facade' or 'system'
-      - kind: 'structural', 'thermal', or 'other'
-    Uses the existing fields: prediction, reason.
-    This is a heuristic and can be refined as your Oracle vocabulary stabilizes.
+    Boolean mask of the entries of a string array that contain any of the keywords.
     """
-    prediction = int(evt.get("prediction", 0))
-    reason = (evt.get("reason") or "").lower()
+    mask = np.zeros(values.shape, dtype=bool)
+    for keyword in keywords:
+        mask |= np.strings.find(values, keyword) >= 0
+    return mask
 
-    if prediction == -1:
-        return {"domain": "system", "kind": "system"}
 
-    # facade-side event
-    kind = "other"
-    if "tilt" in reason or "structural" in reason or "movement" in reason:
-        kind = "structural"
-    elif "temp" in reason or "thermal" in reason or "surface" in reason or "ambient" in reason:
-        kind = "thermal"
+def _classify_events(reasons: List[str], colors: List[str], pred: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Classify all events at once into kind codes:
+      - KIND_SYSTEM for system-side events (prediction == -1)
+      - KIND_STRUCTURAL, KIND_THERMAL or KIND_OTHER for facade-side events
+    Uses the existing fields: prediction, reason (and color for severity).
+    This is a heuristic and can be refined as your Oracle vocabulary stabilizes.
 
-    return {"domain": "facade", "kind": kind}
+    Also returns, per event, the structural severity (0–100, approximated from
+    color / reason) and the thermal gradient deviation proxy (0–100, from
+    reason keywords); the kernel only reads them for the matching kind.
+    """
+    # Case-fold in Python first: lower()/upper() can lengthen a string (e.g. "İ"),
+    # which a fixed-width array would truncate. StringDType keeps each entry at
+    # its own length instead of N × the longest one.
+    reasons = np.array([r.lower() for r in reasons], dtype=np.dtypes.StringDType())
+    colors = np.array([c.upper() for c in colors], dtype=np.dtypes.StringDType())
+
+    is_structural = _contains_any(reasons, ("tilt", "structural", "movement"))
+    is_thermal = _contains_any(reasons, ("temp", "thermal", "surface", "ambient"))
+    kind = np.select(
+        [pred == -1, is_structural, is_thermal],
+        [KIND_SYSTEM, KIND_STRUCTURAL, KIND_THERMAL],
+        default=KIND_OTHER,
+    ).astype(np.int8)
+
+    sev = np.select(
+        [
+            _contains_any(reasons, ("severe", "critical")),
+            np.strings.startswith(colors, "RED"),
+            np.strings.startswith(colors, "YELLOW"),
+        ],
+        [100.0, 90.0, 60.0],
+        default=40.0,
+    )
+    gscore = np.select(
+        [
+            _contains_any(reasons, ("too high", "too low")),
+            _contains_any(reasons, ("high", "low")),
+        ],
+        [90.0, 75.0],
+        default=60.0,
+    )
+    return kind, sev, gscore
+
+
+class EventRecord(msgspec.Struct, frozen=True, array_like=True):
+    """
+    One decoded getEventAt() result, in the contract's output order.
+    Fields are already normalized (int / str / bool) when the record is built;
+    encoded as a compact JSON array by msgspec.
+    """
+    ok: bool
+    color: str
+    status: str
+    prediction: int
+    reason: str
+    timestamp: int
 
 
-def _compute_structural_components(events: List[Dict[str, Any]], now_ts: int) -> Dict[str, float]:
+class EventTable(NamedTuple):
     """
-    Compute F_s, S_s, T_last, N_s (acoustic term currently 0) for the last WINDOW_HOURS.
-    events: list of ALL events up to 'now_ts' (already filtered by panel).
+    Column-oriented view of a panel's events used by the scoring kernel.
+    Rows are in chain order.
+    """
+    ts: np.ndarray        # int64 UNIX seconds
+    pred: np.ndarray      # int64 prediction
+    kind: np.ndarray      # int8 KIND_* code
+    sev: np.ndarray       # float64 structural severity
+    gscore: np.ndarray    # float64 thermal gradient score
+    iso: List[str]        # ISO 8601 timestamps
+    color: List[str]
+    status: List[str]
+    reason: List[str]
+
+    def take(self, order: np.ndarray) -> "EventTable":
+        """
+        Reorder every column by the given row indices.
+        """
+        idx = order.tolist()
+        return EventTable(
+            ts=self.ts[order],
+            pred=self.pred[order],
+            kind=self.kind[order],
+            sev=self.sev[order],
+            gscore=self.gscore[order],
+            iso=[self.iso[i] for i in idx],
+            color=[self.color[i] for i in idx],
+            status=[self.status[i] for i in idx],
+            reason=[self.reason[i] for i in idx],
+        )
+
+
+def _build_event_table(events: List[EventRecord]) -> EventTable:
+    """
+    Classify and format the events from fetch_events_for_panel() in a single pre-pass.
+    """
+    ts = np.array([e.timestamp for e in events], dtype=np.int64)
+    pred = np.array([e.prediction for e in events], dtype=np.int64)
+    color = [e.color for e in events]
+    reason = [e.reason for e in events]
+    kind, sev, gscore = _classify_events(reason, color, pred)
+    return EventTable(
+        ts=ts,
+        pred=pred,
+        kind=kind,
+        sev=sev,
+        gscore=gscore,
+        iso=unix_to_iso_array(ts),
+        color=color,
+        status=[e.status for e in events],
+        reason=reason,
+    )
+
+
+@njit(cache=True)
+def _compute_structural_components(n_struct: int, sum_sev: float, last_ts: int, now_ts: int) -> Tuple[float, float, float, float]:
+    """
+    Compute (F_s, S_s, T_last, N_s) (acoustic term currently 0) for the last WINDOW_HOURS.
+    n_struct / sum_sev: count and summed severity of structural faults in the window.
+    last_ts: timestamp of the most recent structural fault in the window (ignored if n_struct == 0).
     """
-    window_start = now_ts - int(WINDOW_HOURS * SECONDS_IN_HOUR)
-
-    structural_faults: List[Dict[str, Any]] = []
-    for e in events:
-        ts = int(e.get("timestamp", 0))
-        if ts < window_start or ts > now_ts:
-            continue
-        classification = _classify_event(e)
-        if classification["domain"] != "facade":
-            continue
-        if classification["kind"] != "structural":
-            continue
-        # treat prediction == 1 as structural fault
-        if int(e.get("prediction", 0)) == 1:
-            structural_faults.append(e)
-
     # F_s: structural fault frequency (0–100)
-    n_struct = len(structural_faults)
     if STRUCT_FAULTS_MAX_PER_DAY > 0:
         F_s = min(100.0, 100.0 * n_struct / STRUCT_FAULTS_MAX_PER_DAY)
     else:
         F_s = 0.0
 
-    # S_s: structural severity (0–100) – approximated from color / reason
-    severities: List[float] = []
-    for e in structural_faults:
-        color = (e.get("color") or "").upper()
-        reason = (e.get("reason") or "").lower()
-        if "severe" in reason or "critical" in reason:
-            sev = 100.0
-        elif color.startswith("RED"):
-            sev = 90.0
-        elif color.startswith("YELLOW"):
-            sev = 60.0
-        else:
-            sev = 40.0
-        severities.append(sev)
-    S_s = sum(severities) / len(severities) if severities else 0.0
+    # S_s: structural severity (0–100) – mean of the per-fault severities
+    S_s = sum_sev / n_struct if n_struct else 0.0
 
     # T_last: time-since-last structural fault penalty (0–100)
-    if structural_faults:
-        last_ts = max(int(e.get("timestamp", 0)) for e in structural_faults)
+    if n_struct:
         delta_hours = max(0.0, (now_ts - last_ts) / SECONDS_IN_HOUR)
         tau_hours = WINDOW_HOURS  # decay over ~24h
         T_last = 100.0 * math.exp(-delta_hours / tau_hours)
@@ -98,63 +189,29 @@ def _compute_structural_components(events: List[Dict[str, Any]], now_ts: int) ->
     # N_s: acoustic anomaly penalty – currently 0 until INMP441 is integrated
     N_s = 0.0
 
-    return {
-        "F_s": F_s,
-        "S_s": S_s,
-        "T_last": T_last,
-        "N_s": N_s,
-    }
+    return F_s, S_s, T_last, N_s
 
 
-def _compute_thermal_components(events: List[Dict[str, Any]], now_ts: int) -> Dict[str, float]:
+@njit(cache=True)
+def _compute_thermal_components(n_thermal: int, sum_grad: float, last_ts: int, prev_ts: int) -> Tuple[float, float, float, float]:
     """
-    Compute G_t, R_t, A_t, M_t (humidity term currently 0) for the last WINDOW_HOURS.
+    Compute (G_t, R_t, A_t, M_t) (humidity term currently 0) for the last WINDOW_HOURS.
     Since this backend does not store raw Ts/Ta, we approximate these
     components from the thermal-related events (status, prediction, reason).
+    n_thermal / sum_grad: count and summed gradient score of thermal anomalies in the window.
+    last_ts / prev_ts: timestamps of the two most recent ones (ignored if n_thermal < 2).
     """
-    window_start = now_ts - int(WINDOW_HOURS * SECONDS_IN_HOUR)
-
-    thermal_events: List[Dict[str, Any]] = []
-    for e in events:
-        ts = int(e.get("timestamp", 0))
-        if ts < window_start or ts > now_ts:
-            continue
-        classification = _classify_event(e)
-        if classification["domain"] != "facade":
-            continue
-        if classification["kind"] != "thermal":
-            continue
-        # include both faults and warnings as thermal anomalies
-        pred = int(e.get("prediction", 0))
-        if pred in (1, 2):
-            thermal_events.append(e)
-
-    n_thermal = len(thermal_events)
-
     # A_t: thermal anomaly frequency (0–100)
     if THERMAL_EVENTS_MAX_PER_DAY > 0:
         A_t = min(100.0, 100.0 * n_thermal / THERMAL_EVENTS_MAX_PER_DAY)
     else:
         A_t = 0.0
 
-    # G_t: gradient deviation proxy (0–100) – approximate from thermal reason keywords
-    gradient_scores: List[float] = []
-    for e in thermal_events:
-        reason = (e.get("reason") or "").lower()
-        if "too high" in reason or "too low" in reason:
-            score = 90.0
-        elif "high" in reason or "low" in reason:
-            score = 75.0
-        else:
-            score = 60.0
-        gradient_scores.append(score)
-    G_t = sum(gradient_scores) / len(gradient_scores) if gradient_scores else 0.0
+    # G_t: gradient deviation proxy (0–100) – mean of the per-event gradient scores
+    G_t = sum_grad / n_thermal if n_thermal else 0.0
 
     # R_t: rate-of-change proxy (0–100) – based on how close in time the last events are
-    if len(thermal_events) >= 2:
-        thermal_events_sorted = sorted(thermal_events, key=lambda e: int(e.get("timestamp", 0)))
-        last_ts = int(thermal_events_sorted[-1].get("timestamp", 0))
-        prev_ts = int(thermal_events_sorted[-2].get("timestamp", 0))
+    if n_thermal >= 2:
         delta_hours = max(0.0, (last_ts - prev_ts) / SECONDS_IN_HOUR)
         # If two events occur very close in time, penalty is high.
         # If they are far apart (>= WINDOW_HOURS), penalty drops to ~0.
@@ -168,40 +225,82 @@ def _compute_thermal_components(events: List[Dict[str, Any]], now_ts: int) -> Di
     # M_t: humidity penalty – currently 0 until SHT41 is integrated
     M_t = 0.0
 
-    return {
-        "G_t": G_t,
-        "R_t": R_t,
-        "A_t": A_t,
-        "M_t": M_t,
-    }
+    return G_t, R_t, A_t, M_t
 
 
-def _compute_ssi(struct_components: Dict[str, float]) -> float:
+@njit(cache=True)
+def _compute_ssi(F_s: float, S_s: float, T_last: float, N_s: float) -> float:
     """
     SSI = 100 − (0.35·F_s + 0.35·S_s + 0.20·T_last + 0.10·N_s)
     """
-    F_s = struct_components["F_s"]
-    S_s = struct_components["S_s"]
-    T_last = struct_components["T_last"]
-    N_s = struct_components["N_s"]
-
     ssi = 100.0 - (0.35 * F_s + 0.35 * S_s + 0.20 * T_last + 0.10 * N_s)
     return max(0.0, min(100.0, ssi))
 
 
-def _compute_tbi(thermal_components: Dict[str, float]) -> float:
+@njit(cache=True)
+def _compute_tbi(G_t: float, R_t: float, A_t: float, M_t: float) -> float:
     """
     TBI = 100 − (0.40·G_t + 0.25·R_t + 0.20·A_t + 0.15·M_t)
     """
-    G_t = thermal_components["G_t"]
-    R_t = thermal_components["R_t"]
-    A_t = thermal_components["A_t"]
-    M_t = thermal_components["M_t"]
-
     tbi = 100.0 - (0.40 * G_t + 0.25 * R_t + 0.20 * A_t + 0.15 * M_t)
     return max(0.0, min(100.0, tbi))
 
 
+@njit(cache=True)
+def _compute_points(ts, kind, pred, sev, gscore, out_ssi, out_tbi) -> None:
+    """
+    Fill out_ssi / out_tbi with the index values at each event time
+    (sliding window over the last WINDOW_HOURS).
+
+    All inputs are parallel arrays and must be sorted by ts: the most recent
+    in-window structural fault / thermal anomalies are simply the last ones
+    admitted, with no per-point sort or max(). Single left-to-right sweep:
+    events enter the window once (as soon as their timestamp is <= now) and
+    leave once, so every point costs O(1) amortized.
+    """
+    n = ts.shape[0]
+    admitted = 0   # events [0, admitted) have ts <= now
+    evicted = 0    # events [0, evicted) fell out of the window
+    n_struct = 0
+    sum_sev = 0.0
+    last_struct_ts = 0
+    n_thermal = 0
+    sum_grad = 0.0
+    last_thermal_ts = 0
+    prev_thermal_ts = 0
+
+    for i in range(n):
+        now_ts = ts[i]
+        # admit every event up to "now" (including later ones sharing this timestamp)
+        while admitted < n and ts[admitted] <= now_ts:
+            if kind[admitted] == KIND_STRUCTURAL and pred[admitted] == 1:
+                n_struct += 1
+                sum_sev += sev[admitted]
+                last_struct_ts = ts[admitted]
+            elif kind[admitted] == KIND_THERMAL and (pred[admitted] == 1 or pred[admitted] == 2):
+                n_thermal += 1
+                sum_grad += gscore[admitted]
+                prev_thermal_ts = last_thermal_ts
+                last_thermal_ts = ts[admitted]
+            admitted += 1
+
+        # evict events that fell out of the 24h window
+        window_start = now_ts - WINDOW_SECONDS
+        while evicted < admitted and ts[evicted] < window_start:
+            if kind[evicted] == KIND_STRUCTURAL and pred[evicted] == 1:
+                n_struct -= 1
+                sum_sev -= sev[evicted]
+            elif kind[evicted] == KIND_THERMAL and (pred[evicted] == 1 or pred[evicted] == 2):
+                n_thermal -= 1
+                sum_grad -= gscore[evicted]
+            evicted += 1
+
+        F_s, S_s, T_last, N_s = _compute_structural_components(n_struct, sum_sev, last_struct_ts, now_ts)
+        G_t, R_t, A_t, M_t = _compute_thermal_components(n_thermal, sum_grad, last_thermal_ts, prev_thermal_ts)
+        out_ssi[i] = _compute_ssi(F_s, S_s, T_last, N_s)
+        out_tbi[i] = _compute_tbi(G_t, R_t, A_t, M_t)
+
+
 def _compute_performance_score(ssi: float, tbi: float) -> Dict[str, Any]:
     """
     PS = (SSI × 0.5 + TBI × 0.5) / 25
@@ -228,7 +327,15 @@ def _compute_performance_score(ssi: float, tbi: float) -> Dict[str, Any]:
     }
 
 
-def compute_performance_for_panel(dpp: Dict[str, Any], events: List[Dict[str, Any]]) -> Dict[str, Any]:
+def warm_up() -> None:
+    """
+    Compile the numba kernels (or load them from the on-disk cache) by scoring a
+    one-event panel, so the first real request does not pay the JIT cost.
+    """
+    compute_performance_for_panel({}, [EventRecord(True, "", "", 1, "tilt", 0)])
+
+
+def compute_performance_for_panel(dpp: Dict[str, Any], events: List[EventRecord]) -> Dict[str, Any]:
     """
     Main entry point used from app.py.
 
@@ -252,7 +359,8 @@ def compute_performance_for_panel(dpp: Dict[str, Any], events: List[Dict[str, An
         "tilt_angle_deg": installation.get("tilt_angle_deg"),
     }
 
-    if not events:
+    n = len(events)
+    if not n:
         # No events yet – return empty points and no system errors
         return {
             "panel_metadata": panel_metadata,
@@ -260,38 +368,41 @@ def compute_performance_for_panel(dpp: Dict[str, Any], events: List[Dict[str, An
             "system_events": [],
         }
 
-    # Sort events by timestamp
-    sorted_events = sorted(events, key=lambda e: int(e.get("timestamp", 0)))
+    table = _build_event_table(events)
+
+    # Sort events by timestamp (stable, so chain order breaks ties). Events are
+    # appended on-chain in time order, so this is usually already the case and
+    # the reorder (which copies every column) can be skipped.
+    if np.any(table.ts[1:] < table.ts[:-1]):
+        table = table.take(np.argsort(table.ts, kind="stable"))
+
     # We'll compute indexes at each event time (sliding window over last 24h).
+    out_ssi = np.empty(n, dtype=np.float64)
+    out_tbi = np.empty(n, dtype=np.float64)
+    _compute_points(table.ts, table.kind, table.pred, table.sev, table.gscore, out_ssi, out_tbi)
+
     points: List[Dict[str, Any]] = []
     system_events: List[Dict[str, Any]] = []
 
-    for evt in sorted_events:
-        now_ts = int(evt.get("timestamp", 0))
-        # all events up to "now"
-        events_up_to = [e for e in sorted_events if int(e.get("timestamp", 0)) <= now_ts]
-
+    for i, (now_ts, evt_kind, ssi, tbi) in enumerate(
+        zip(table.ts.tolist(), table.kind.tolist(), out_ssi.tolist(), out_tbi.tolist())
+    ):
+        now_iso = table.iso[i]
         # classify this event for system graph
-        cls = _classify_event(evt)
-        if cls["domain"] == "system":
+        if evt_kind == KIND_SYSTEM:
             system_events.append({
                 "timestamp_unix": now_ts,
-                "timestamp": _unix_to_iso(now_ts),
-                "color": evt.get("color"),
-                "status": evt.get("status"),
-                "reason": evt.get("reason"),
+                "timestamp": now_iso,
+                "color": table.color[i],
+                "status": table.status[i],
+                "reason": table.reason[i],
             })
 
-        struct_comp = _compute_structural_components(events_up_to, now_ts)
-        thermal_comp = _compute_thermal_components(events_up_to, now_ts)
-
-        ssi = _compute_ssi(struct_comp)
-        tbi = _compute_tbi(thermal_comp)
         perf = _compute_performance_score(ssi, tbi)
 
         points.append({
             "timestamp_unix": now_ts,
-            "timestamp": _unix_to_iso(now_ts),
+            "timestamp": now_iso,
             "ssi": ssi,
             "tbi": tbi,
             "performance_numeric": perf["numeric"],